@@ -6,4 +6,8 @@ TYPE_MAPPING = {
     'str': str, 
     'int': int,
     'bool': bool 
-}
\ No newline at end of file
+}
+
+# Максимальное количество строк, сортируемых в памяти.
+# При превышении отсортированные порции сбрасываются во временные файлы.
+SORT_MEMORY_LIMIT = 100_000
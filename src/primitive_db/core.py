@@ -1,10 +1,15 @@
+import heapq
 import json
+from itertools import islice
+from operator import itemgetter
 
 from prettytable import PrettyTable
 
 from src.decorators import confirm_action, create_cacher, handle_db_errors, log_time
 from src.primitive_db.constants import ALLOWED_TYPES, TYPE_MAPPING
 from src.primitive_db.parser import define_value_type
+from src.primitive_db.utils import external_sort, get_row_value, get_row_values
+from src.primitive_db.views import dependent_views
 
 
 @handle_db_errors
@@ -75,9 +80,14 @@ def drop_table(metadata: dict, table_name: str) -> dict:
         
     Вызывает ValueError, если:
     - таблицы с указанным именем не существует
+    - по таблице построены материализованные представления
     """
     if table_name not in metadata:
         raise ValueError(f"Таблицы '{table_name}' не существует.")
+    views = dependent_views(metadata, table_name)
+    if views:
+        raise ValueError((f"По таблице '{table_name}' построены представления: "
+                          f"{', '.join(views)}. Сначала удалите их."))
     del metadata[table_name]
     return metadata
 
@@ -90,17 +100,21 @@ def list_tables(metadata: dict) -> list:
 
 @handle_db_errors
 @log_time
-def insert(metadata: dict, table_name: str, values: list) -> dict:
+def insert(metadata: dict, table_name: str, values: list, changes=None) -> dict:
     """
     Добавляет записи в таблицу.
+    Если передан список changes, добавляет в него пару (None, новая запись).
 
     Вызывает ValueError, если:
     - Таблица с указанным названием не найдена.
+    - Таблица является материализованным представлением.
     - Количество введенных значений не совпадает с количеством столбцов в таблице.
     - Введен неверный тип данных для столбца.
     """
     if table_name not in metadata:
         raise ValueError(f'Таблицы {table_name} нет.')
+    if 'view' in metadata[table_name]:
+        raise ValueError(f'{table_name} - представление, изменять его нельзя.')
     column_names = list(metadata[table_name]['columns'].keys())
     if len(values) != len(column_names) - 1:
         raise ValueError((f'Количество введенных значений не совпадает '
@@ -129,6 +143,8 @@ def insert(metadata: dict, table_name: str, values: list) -> dict:
     if 'data' not in metadata[table_name]:
         metadata[table_name]['data'] = []
     metadata[table_name]['data'].append(new_line)
+    if changes is not None:
+        changes.append((None, dict(new_line)))
     print('Запись успешно добавлена.')
 
     return metadata
@@ -144,13 +160,41 @@ def create_row_filter_function(column, value, all_column_names):
     return row_filter
 
 
+def order_rows(rows, column_index: int, direction: str, limit=None):
+    """
+    Сортирует строки таблицы (итератор) по столбцу с индексом column_index.
+
+    - Задан limit: выбираются K первых строк через кучу за O(n log K).
+    - Иначе: полная внешняя сортировка слиянием (см. external_sort),
+      результат возвращается итератором.
+    """
+    reverse = direction == 'desc'
+    value_of = itemgetter(column_index)
+    # Пустые значения (столбец добавлен без значения по умолчанию) - в конце
+    # при любом направлении: для desc признак пустоты инвертируется,
+    # так как ключ сортируется в обратном порядке.
+    def key(row):
+        value = value_of(row)
+        is_empty = value is None
+        return (is_empty != reverse, value)
+    if limit is not None:
+        if reverse:
+            return heapq.nlargest(limit, rows, key=key)
+        return heapq.nsmallest(limit, rows, key=key)
+    return external_sort(rows, key=key, reverse=reverse)
+
+
 query_cacher = create_cacher()
 @handle_db_errors
 @log_time
-def select(table_data: dict, where_clause=None) -> PrettyTable:
+def select(table_data: dict, where_clause=None,
+           order_clause=None, limit=None) -> PrettyTable:
     """
     Если не передано условие фильтрации, выводит на экран всю таблицу.
     Если задано условие фильтрации, выводит только нужную строку.
+    Если задано условие сортировки (например, {'age': 'desc'}),
+    упорядочивает записи по столбцу.
+    Если задан limit, выводит не более limit записей.
 
     Использует механизм кэширования: 
     - если запрос вызывался ранее, он будет возвращен из кэша.
@@ -159,26 +203,29 @@ def select(table_data: dict, where_clause=None) -> PrettyTable:
     Вызывает ValueError, если:
     - Передан неверный тип данных для столбца.
     - Таблица с указанным названием не найдена.
+    - Столбца для сортировки нет в таблице.
     """
     key_data_part = json.dumps(table_data, sort_keys=True)
     key_where_part = json.dumps(where_clause, sort_keys=True) if where_clause else 'NONE' #noqa: E501
-    cache_key = (key_data_part, key_where_part)
+    key_order_part = json.dumps(order_clause) if order_clause else 'NONE'
+    cache_key = (key_data_part, key_where_part, key_order_part, limit)
 
     def execute_query():
         if not table_data:
             raise ValueError('Такой таблицы нет.')
         column_names = list(table_data['columns'].keys())
-        data = table_data.get('data')
-        if data:
-            rows = [list(row.values()) for row in table_data['data']]
-        else:
-            rows = []
-        table = PrettyTable()
-        table.field_names = column_names
-        table.add_rows(rows)
-        if not where_clause:
-            return table
-        else:
+        data = table_data.get('data') or []
+        order_column = list(order_clause.keys())[0] if order_clause else None
+        if order_column is not None and order_column not in column_names:
+            raise ValueError(f'Столбца "{order_column}" нет в таблице.')
+        # Записи хранятся в порядке возрастания ID,
+        # поэтому для сортировки по ID достаточно обойти их в нужную сторону.
+        if order_column == 'ID' and order_clause['ID'] == 'desc':
+            data = reversed(data)
+        # Строки обрабатываются лениво: сортировка получает итератор,
+        # а не заранее построенный список всех строк.
+        rows = (get_row_values(table_data, row) for row in data)
+        if where_clause:
             column_name = list(where_clause.keys())[0]
             column_type = table_data['columns'][column_name]
             expected_type = TYPE_MAPPING[column_type]
@@ -188,7 +235,17 @@ def select(table_data: dict, where_clause=None) -> PrettyTable:
                                         f'Ожидался: {expected_type}\n'
                                         f'Получен: {type(value)}'))
             filter_function = create_row_filter_function(column_name, value, column_names) #noqa: E501
-            return table.get_string(row_filter=filter_function)
+            rows = filter(filter_function, rows)
+        if order_column is not None and order_column != 'ID':
+            rows = order_rows(rows, column_names.index(order_column),
+                              order_clause[order_column], limit)
+        elif limit is not None:
+            rows = islice(rows, limit)
+        table = PrettyTable()
+        table.field_names = column_names
+        for row in rows:
+            table.add_row(row)
+        return table
     if cache_key:
         result = query_cacher(cache_key, execute_query)
     else:
@@ -196,22 +253,37 @@ def select(table_data: dict, where_clause=None) -> PrettyTable:
     return result
 
 
-def update(table_data: dict, set_clause: dict, where_clause: dict) -> dict:
+@handle_db_errors
+def update(table_data: dict, set_clause: dict, where_clause: dict,
+           changes=None) -> dict:
     """
     Обновляет значение в таблице по заданному условию.
     Возвращает обновленную таблицу.
+    Если передан список changes, добавляет в него пары
+    (старая запись, новая запись).
 
     Вызывает ValueError, если 
     - Указанной таблицы нет в базе данных.
+    - Таблица является материализованным представлением.
+    - Столбца из условия нет в таблице.
+    - Попытка изменить столбец ID.
     - Введен неверный тип данных для столбца.
     """
     if not table_data:
         raise ValueError('Такой таблицы нет.')
+    if 'view' in table_data:
+        raise ValueError('Представление изменять нельзя.')
     
     set_column = list(set_clause.keys())[0]
     set_value = set_clause[set_column]
+    if set_column == 'ID':
+        # ID назначаются по порядку записей; на этом держится
+        # сортировка по ID без сортировки (см. select).
+        raise ValueError('Столбец ID изменять нельзя.')
     where_column = list(where_clause.keys())[0]
     where_value = where_clause[where_column]
+    if where_column not in table_data['columns']:
+        raise ValueError(f'Столбца "{where_column}" нет в таблице.')
 
     set_column_type = table_data['columns'][set_column] 
     expected_type = TYPE_MAPPING[set_column_type]
@@ -219,13 +291,16 @@ def update(table_data: dict, set_clause: dict, where_clause: dict) -> dict:
     rows = table_data['data']
     updated_rows = []
     for row in rows:
-        if row[where_column] == where_value:
+        if get_row_value(table_data, row, where_column) == where_value:
             if not isinstance(set_value, expected_type):
                 raise ValueError((f'Неверный тип данных для столбца "{set_column}"'
                                   f'Ожидался: "{set_column_type}"'
                                   f'Получен: "{type(set_value)}"'))
+            old_row = dict(row)
             row[set_column] = set_value
             updated_rows.append(row)
+            if changes is not None:
+                changes.append((old_row, dict(row)))
     if updated_rows:
         if len(updated_rows) == 1:
             print('Обновлена 1 запись')
@@ -239,24 +314,33 @@ def update(table_data: dict, set_clause: dict, where_clause: dict) -> dict:
 
 @confirm_action("удаление записи")
 @handle_db_errors
-def delete(table_data: dict, where_clause: dict) -> dict:
+def delete(table_data: dict, where_clause: dict, changes=None) -> dict:
     """
     Функция находит записи по условию и удаляет их.
     Сдвигает индексы.
     Возвращает измененные данные.
+    Если передан список changes, добавляет в него пары (удаленная запись, None).
 
     Вызывает ValueError, если 
     - Указанной таблицы нет в базе данных.
+    - Таблица является материализованным представлением.
+    - Столбца из условия нет в таблице.
     """
     if not table_data:
         raise ValueError('Такой таблицы нет.')
+    if 'view' in table_data:
+        raise ValueError('Представление изменять нельзя.')
     column = list(where_clause.keys())[0]
     value = where_clause[column]
+    if column not in table_data['columns']:
+        raise ValueError(f'Столбца "{column}" нет в таблице.')
     rows = table_data['data']
     for row in rows:
-        if row[column] == value:
+        if get_row_value(table_data, row, column) == value:
             row_index = rows.index(row)
             rows.remove(row)
+            if changes is not None:
+                changes.append((dict(row), None))
             for i in range(row_index, len(rows)):
                 rows[i]['ID'] = i + 1
     table_data['data'] = rows 
@@ -281,4 +365,120 @@ def info(table_data: dict, table_name: str) -> None:
         n_rows = len(table_data['data'])
     print(f'Таблица: {table_name}')
     print(f'Столбцы: {columns}')
-    print(f'Количество записей: {n_rows}')
\ No newline at end of file
+    print(f'Количество записей: {n_rows}')
+
+@handle_db_errors
+def compact_table(table_data: dict) -> dict:
+    """
+    Переписывает записи таблицы под текущую схему:
+    удаляет значения удаленных столбцов и записывает
+    значения по умолчанию для добавленных столбцов.
+    Возвращает обновленную таблицу.
+
+    Вызывает ValueError, если
+    - Указанной таблицы нет в базе данных.
+    """
+    if not table_data:
+        raise ValueError('Такой таблицы нет.')
+    columns = list(table_data['columns'].keys())
+    table_data['data'] = [
+        dict(zip(columns, get_row_values(table_data, row)))
+        for row in table_data.get('data', [])
+    ]
+    table_data.pop('defaults', None)
+    table_data.pop('dropped', None)
+    return table_data
+
+@handle_db_errors
+def add_column(metadata: dict, table_name: str, column: dict,
+               default=None) -> dict:
+    """
+    Добавляет столбец в таблицу, изменяя только метаданные.
+    Существующие записи не переписываются: значение по умолчанию
+    подставляется при чтении.
+
+    Принимает:
+        metadata (dict): текущий словарь метаданных
+        table_name (str): название таблицы
+        column (dict): описание столбца, например {'email': 'str'}
+        default (str): значение по умолчанию (необязательно)
+
+    Вызывает ValueError, если:
+    - Таблица с указанным названием не найдена.
+    - Таблица является материализованным представлением.
+    - Столбец с таким названием уже существует.
+    - Обнаружен некорректный тип данных для столбца.
+    - Значение по умолчанию не соответствует типу столбца.
+    """
+    if table_name not in metadata:
+        raise ValueError(f'Таблицы {table_name} нет.')
+    table_data = metadata[table_name]
+    if 'view' in table_data:
+        raise ValueError(f'{table_name} - представление, изменять его нельзя.')
+    col_name, col_type = list(column.items())[0]
+    if 'id' in col_name:
+        col_name = col_name.upper()
+    if col_name in table_data['columns']:
+        raise ValueError(f'Столбец "{col_name}" уже существует.')
+    if col_type not in ALLOWED_TYPES:
+        raise ValueError((f"Некорректный тип данных '{col_type}'"
+                          f" для столбца '{col_name}'.\n"
+                          f"Разрешены только: {', '.join(ALLOWED_TYPES)}"))
+    if default is not None:
+        expected_type = TYPE_MAPPING[col_type]
+        default = define_value_type(default)
+        if not isinstance(default, expected_type):
+            raise ValueError((f'Неверный тип значения по умолчанию '
+                              f'для столбца {col_name}.\n'
+                              f'Ожидался: {expected_type}\n'
+                              f'Получен: {type(default)}.'))
+    if col_name in table_data.get('dropped', []):
+        # В старых записях остались значения удаленного столбца
+        # с тем же именем - их нужно стереть до повторного добавления.
+        table_data = compact_table(table_data)
+
+    table_data['columns'][col_name] = col_type
+    if default is not None:
+        table_data.setdefault('defaults', {})[col_name] = default
+    metadata[table_name] = table_data
+    print(f'Столбец "{col_name}:{col_type}" добавлен в таблицу "{table_name}".')
+    return metadata
+
+@confirm_action("удаление столбца")
+@handle_db_errors
+def drop_column(metadata: dict, table_name: str, column: str) -> dict:
+    """
+    Удаляет столбец из таблицы, изменяя только метаданные.
+    Значения столбца остаются в записях и игнорируются
+    при чтении до следующего сжатия таблицы (compact_table).
+    Столбец так же удаляется из построенных по таблице представлений.
+
+    Вызывает ValueError, если:
+    - Таблица с указанным названием не найдена.
+    - Таблица является материализованным представлением.
+    - Столбца с указанным названием нет.
+    - Попытка удалить столбец ID.
+    - По столбцу фильтруется или группируется представление.
+    """
+    if table_name not in metadata:
+        raise ValueError(f'Таблицы {table_name} нет.')
+    table_data = metadata[table_name]
+    if 'view' in table_data:
+        raise ValueError(f'{table_name} - представление, изменять его нельзя.')
+    if column == 'ID':
+        raise ValueError('Столбец ID удалить нельзя.')
+    if column not in table_data['columns']:
+        raise ValueError(f'Столбца "{column}" нет в таблице {table_name}.')
+    views = dependent_views(metadata, table_name)
+    for view_name in views:
+        view = metadata[view_name]['view']
+        if column in (view['where'] or {}) or column == view['group_by']:
+            raise ValueError((f'Столбец "{column}" используется '
+                              f'в представлении {view_name}.'))
+    for table in [table_data] + [metadata[view_name] for view_name in views]:
+        if column in table['columns']:
+            del table['columns'][column]
+            table.get('defaults', {}).pop(column, None)
+            table.setdefault('dropped', []).append(column)
+    print(f'Столбец "{column}" удален из таблицы "{table_name}".')
+    return metadata
@@ -6,8 +6,11 @@ import prompt
 from src.decorators import handle_db_errors
 from src.primitive_db.constants import DB_METADATA_FILE
 from src.primitive_db.core import (
+     add_column,
+     compact_table,
      create_table,
      delete,
+     drop_column,
      drop_table,
      info,
      insert,
@@ -17,7 +20,9 @@ from src.primitive_db.core import (
 )
 from src.primitive_db.parser import (
      insert_columns_parser,
+     select_clauses_parser,
      set_clause_parser,
+     view_clauses_parser,
      where_clause_parser,
 )
 from src.primitive_db.utils import (
@@ -27,6 +32,12 @@ from src.primitive_db.utils import (
      save_table_data,
      show_table,
 )
+from src.primitive_db.views import (
+     apply_changes,
+     create_view,
+     dependent_views,
+     refresh_view,
+)
 
 
 def help():
@@ -37,11 +48,20 @@ def help():
      '<столбец1:тип> <столбец2:тип> .. - создать таблицу'))
      print('list_tables - показать список всех таблиц')
      print('drop_table <имя_таблицы> - удалить таблицу')
+     print(('alter table <имя_таблицы> add column <столбец:тип> '
+     '[default <значение>] - добавить столбец.'))
+     print(('alter table <имя_таблицы> drop column <столбец> '
+     '- удалить столбец.'))
+     print(('compact <имя_таблицы> - переписать записи под текущую схему '
+     '(после alter table).'))
      print(('insert into <имя_таблицы> '
      'values (<значение1>, <значение2>, ...) - создать запись.')) 
      print(('select from <имя_таблицы> '
      'where <столбец> = <значение> - прочитать записи по условию.')) 
      print('select from <имя_таблицы> - прочитать все записи.')
+     print(('select from <имя_таблицы> [where <столбец> = <значение>] '
+     'order by <столбец> [asc|desc] [limit <число>] '
+     '- прочитать записи в отсортированном порядке.'))
      print(('update <имя_таблицы> '
      'set <столбец1> = <новое_значение1> '
      'where <столбец_условия> = <значение_условия> - обновить запись.'))
@@ -49,10 +69,26 @@ def help():
      'where <столбец> = <значение> - удалить запись.'))
      print('info <имя_таблицы> - вывести информацию о таблице.')
 
+     print('\nКоманды для работы с материализованными представлениями:')
+     print(('create materialized view <имя_представления> as select from '
+     '<имя_таблицы> [where <столбец> = <значение>] [group by <столбец>] '
+     '- создать представление.'))
+     print(('refresh <имя_представления> '
+     '- полностью пересчитать представление.'))
+     print(('Представления обновляются автоматически при insert, update и delete, '
+     'читаются командой select.'))
+
      print('\nОбщие команды:')
      print('exit - выйти из программы')
      print('help - справочная информация')
 
+def save_views(db_meta: dict, view_names: list):
+     """
+     Сохраняет данные обновленных материализованных представлений.
+     """
+     for view_name in view_names:
+          save_table_data(view_name + '.json', db_meta[view_name])
+
 @handle_db_errors
 def run():
     print('\nДобро пожаловать в примитивную базу данных!\n\n')
@@ -105,6 +141,74 @@ def run():
                         save_metadata(DB_METADATA_FILE, db_meta)
                         os.remove(table_filepath) 
                         print(f'Таблица с именем "{table_name}" успешно удалена.')
+                case 'alter':
+                    if len(args) not in (5, 7) or args[0] != 'table' \
+                            or args[3] != 'column':
+                        print(('Неверный ввод команды.\n'
+                        'Ожидается: alter table <имя_таблицы> '
+                        'add|drop column ...\nПопробуйте снова.'))
+                        continue
+                    table_name = args[1]
+                    action = args[2]
+                    if action == 'add':
+                        if len(args) == 7 and args[5] != 'default':
+                            print(('Ожидается: add column <столбец:тип> '
+                            '[default <значение>]\nПопробуйте снова.'))
+                            continue
+                        column = insert_columns_parser(args[4:5])
+                        if column is None:
+                            continue
+                        default = args[6] if len(args) == 7 else None
+                        db_meta = add_column(db_meta, table_name, column, default)
+                    elif action == 'drop' and len(args) == 5:
+                        db_meta = drop_column(db_meta, table_name, args[4])
+                    else:
+                        print('Неверный ввод команды. Попробуйте снова.')
+                        continue
+                    if db_meta is not None:
+                        save_metadata(DB_METADATA_FILE, db_meta)
+                        save_table_data(table_name + '.json', db_meta[table_name])
+                        save_views(db_meta, dependent_views(db_meta, table_name))
+                case 'compact':
+                    if len(args) != 1:
+                        print(('Передано неверное количество аргументов. '
+                        'Ожидается 1: <имя_таблицы>\nПопробуйте снова.'))
+                        continue
+                    table_name = args[0]
+                    table_data = compact_table(db_meta.get(table_name))
+                    if table_data is not None:
+                        db_meta[table_name] = table_data
+                        save_metadata(DB_METADATA_FILE, db_meta)
+                        save_table_data(table_name + '.json', table_data)
+                        print(f'Таблица "{table_name}" сжата.')
+                case 'create':
+                    if len(args) < 7 or args[:2] != ['materialized', 'view'] \
+                            or args[3:6] != ['as', 'select', 'from']:
+                        print(('Неверный ввод команды.\n'
+                        'Ожидается: create materialized view <имя_представления> '
+                        'as select from <имя_таблицы> ...\nПопробуйте снова.'))
+                        continue
+                    view_name = args[2]
+                    table_name = args[6]
+                    clauses = view_clauses_parser(args[7:])
+                    if clauses is None:
+                        continue
+                    db_meta = create_view(db_meta, view_name, table_name,
+                                          clauses['where'], clauses['group_by'])
+                    if db_meta is not None:
+                        save_metadata(DB_METADATA_FILE, db_meta)
+                        save_views(db_meta, [view_name])
+                case 'refresh':
+                    if len(args) != 1:
+                        print(('Передано неверное количество аргументов. '
+                        'Ожидается 1: <имя_представления>\nПопробуйте снова.'))
+                        continue
+                    view_name = args[0]
+                    db_meta = refresh_view(db_meta, view_name)
+                    if db_meta is not None:
+                        save_metadata(DB_METADATA_FILE, db_meta)
+                        save_views(db_meta, [view_name])
+                        print(f'Представление "{view_name}" обновлено.')
                 case 'list_tables':
                     if len(args) > 0:
                         print(('Неверный ввод команды.\n'
@@ -135,14 +239,13 @@ def run():
                     table_name = args[0]
                     table_filepath = table_name + '.json'
                     table = load_table_data(table_filepath)
+                    clauses = select_clauses_parser(args[1:])
+                    if clauses is None:
+                        continue
                     if table is not None:
-                        if 'where' in args:
-                            where_clause = where_clause_parser(args[2:])
-                            table = select(table, where_clause) 
-                            print(table)
-                        else:
-                            table = select(table)
-                            print(table)
+                        table = select(table, clauses['where'],
+                                       clauses['order_by'], clauses['limit'])
+                        print(table)
                     else:
                         print('Ошибка чтения таблицы.')
                 case 'insert':
@@ -163,11 +266,14 @@ def run():
                         'в скобках: (<значение1>, <значение2> ...)'))
                         continue
                     processed_values = [value.strip('(').strip(')').strip(',') for value in values] #noqa: E501
-                    db_meta = insert(db_meta, table_name, processed_values)
+                    changes = []
+                    db_meta = insert(db_meta, table_name, processed_values, changes)
                     if db_meta is not None:
                         table_data = db_meta[table_name]
+                        view_names = apply_changes(db_meta, table_name, changes)
                         save_metadata(DB_METADATA_FILE, db_meta)
                         save_table_data(table_filepath, table_data)
+                        save_views(db_meta, view_names)
                 case 'update':
                     if len(args) != 9:
                         print('Неверный ввод команды. Попробуйте снова.')
@@ -190,11 +296,18 @@ def run():
                         continue
                     set_clause = set_clause_parser(set_clause)
                     where_clause = where_clause_parser(where_clause)
-                    if table is not None:
-                        updated_table = update(table_data, set_clause, where_clause)
+                    changes = []
+                    if table_data is not None:
+                        updated_table = update(table_data, set_clause,
+                                               where_clause, changes)
+                    else:
+                        updated_table = None
+                    if updated_table is not None:
                         db_meta[table_name] = updated_table
+                        view_names = apply_changes(db_meta, table_name, changes)
                         save_table_data(table_filepath, updated_table)
                         save_metadata(DB_METADATA_FILE, db_meta)
+                        save_views(db_meta, view_names)
                         print(show_table(updated_table))
                     else:
                         print('Не удалось обновить запись.')
@@ -214,10 +327,15 @@ def run():
                         continue
                     where_clause = where_clause_parser(where_clause)
                     if table_data is not None:
-                        updated_table = delete(table_data, where_clause)
+                        changes = []
+                        updated_table = delete(table_data, where_clause, changes)
+                        if updated_table is None:
+                            continue
                         db_meta[table_name] = updated_table
+                        view_names = apply_changes(db_meta, table_name, changes)
                         save_table_data(table_filepath, updated_table) 
                         save_metadata(DB_METADATA_FILE, db_meta)
+                        save_views(db_meta, view_names)
                         print('Запись успешно удалена. Обновленная таблица: ')
                         print(show_table(updated_table)) 
                 case 'info':
@@ -56,4 +56,71 @@ def set_clause_parser(clause: list) -> dict:
         column_name: value
     }
 
-    return set_clause
\ No newline at end of file
+    return set_clause
+
+@handle_db_errors
+def select_clauses_parser(clauses: list) -> dict:
+    """
+    Парсит часть запроса select после имени таблицы
+    (пример ввода: ['where', 'age', '=', '28', 'order', 'by', 'name', 'limit', '5'])
+    в словарь типа
+    {'where': {'age': 28}, 'order_by': {'name': 'asc'}, 'limit': 5}
+
+    Вызывает ValueError, если:
+    - Условия введены в неправильном формате или порядке.
+    - Значение limit не является положительным целым числом.
+    """
+    result = {'where': None, 'order_by': None, 'limit': None}
+    if clauses[:1] == ['where']:
+        if len(clauses) < 4 or clauses[2] != '=':
+            raise ValueError('Ожидается: where <столбец> = <значение>')
+        result['where'] = where_clause_parser(clauses[1:4])
+        clauses = clauses[4:]
+    if clauses[:1] == ['order']:
+        if len(clauses) < 3 or clauses[1] != 'by':
+            raise ValueError('Ожидается: order by <столбец> [asc|desc]')
+        column = clauses[2]
+        clauses = clauses[3:]
+        direction = 'asc'
+        if clauses[:1] and clauses[0].lower() in ('asc', 'desc'):
+            direction = clauses[0].lower()
+            clauses = clauses[1:]
+        result['order_by'] = {column: direction}
+    if clauses[:1] == ['limit']:
+        if len(clauses) != 2 or not clauses[1].isdigit() or int(clauses[1]) == 0:
+            raise ValueError('Ожидается: limit <положительное целое число>')
+        result['limit'] = int(clauses[1])
+        clauses = []
+    if clauses:
+        raise ValueError('Неверный формат запроса.\n'
+                         'Ожидается: [where <столбец> = <значение>] '
+                         '[order by <столбец> [asc|desc]] [limit <число>]')
+    return result
+
+
+@handle_db_errors
+def view_clauses_parser(clauses: list) -> dict:
+    """
+    Парсит условия материализованного представления после имени таблицы
+    (пример ввода: ['where', 'is_active', '=', 'true', 'group', 'by', 'age'])
+    в словарь типа {'where': {'is_active': True}, 'group_by': 'age'}
+
+    Вызывает ValueError, если:
+    - Условия введены в неправильном формате или порядке.
+    """
+    result = {'where': None, 'group_by': None}
+    if clauses[:1] == ['where']:
+        if len(clauses) < 4 or clauses[2] != '=':
+            raise ValueError('Ожидается: where <столбец> = <значение>')
+        result['where'] = where_clause_parser(clauses[1:4])
+        clauses = clauses[4:]
+    if clauses[:1] == ['group']:
+        if len(clauses) != 3 or clauses[1] != 'by':
+            raise ValueError('Ожидается: group by <столбец>')
+        result['group_by'] = clauses[2]
+        clauses = []
+    if clauses:
+        raise ValueError('Неверный формат запроса.\n'
+                         'Ожидается: [where <столбец> = <значение>] '
+                         '[group by <столбец>]')
+    return result
@@ -1,9 +1,12 @@
+import heapq
 import json
 import os
+import tempfile
 
 from prettytable import PrettyTable
 
 from src.decorators import handle_db_errors
+from src.primitive_db.constants import SORT_MEMORY_LIMIT
 
 
 @handle_db_errors
@@ -50,11 +53,81 @@ def save_table_data(filepath: str, table: dict):
     with open(filepath, mode='w', encoding='utf-8') as f:
         json.dump(table, f, ensure_ascii=False, indent=4)
 
+def get_row_value(table_data: dict, row: dict, column: str):
+    """
+    Возвращает значение столбца в записи.
+    Если запись создана до добавления столбца (alter table ... add column),
+    возвращает значение по умолчанию для этого столбца.
+    Значения удаленных столбцов (alter table ... drop column) не возвращаются.
+    """
+    if column in row and column in table_data['columns']:
+        return row[column]
+    return table_data.get('defaults', {}).get(column)
+
+
+def get_row_values(table_data: dict, row: dict) -> list:
+    """
+    Возвращает значения записи в порядке текущих столбцов таблицы.
+    Удаленные столбцы (alter table ... drop column) пропускаются,
+    для добавленных подставляются значения по умолчанию.
+    """
+    return [get_row_value(table_data, row, column) for column in table_data['columns']]
+
+
 @handle_db_errors
 def show_table(table_data: dict) -> PrettyTable:
     columns = list(table_data['columns'].keys())
-    rows = [list(row.values()) for row in table_data['data']]
+    rows = [get_row_values(table_data, row) for row in table_data.get('data', [])]
     table = PrettyTable()
     table.field_names = columns 
     table.add_rows(rows)
-    return table
\ No newline at end of file
+    return table
+
+
+def _spill_run(rows: list, key, reverse: bool):
+    """
+    Сортирует порцию строк и сбрасывает ее во временный файл
+    (одна строка таблицы - одна строка JSON).
+    """
+    rows.sort(key=key, reverse=reverse)
+    run = tempfile.TemporaryFile(mode='w+', encoding='utf-8')
+    for row in rows:
+        run.write(json.dumps(row, ensure_ascii=False) + '\n')
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    """
+    Построчно читает отсортированную порцию из временного файла.
+    """
+    for line in run:
+        yield json.loads(line)
+
+
+def external_sort(rows, key, reverse: bool = False,
+                  memory_limit: int = SORT_MEMORY_LIMIT):
+    """
+    Сортирует строки внешней сортировкой слиянием.
+    Принимает и возвращает итератор, поэтому в памяти одновременно
+    находится не больше memory_limit сортируемых строк.
+
+    Пока количество строк не превышает memory_limit, сортировка
+    выполняется в памяти. Иначе каждая порция из memory_limit строк
+    сортируется и сбрасывается во временный файл, после чего порции
+    сливаются через heapq.merge. Сортировка устойчивая.
+    """
+    runs = []
+    buffer = []
+    try:
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= memory_limit:
+                runs.append(_spill_run(buffer, key, reverse))
+                buffer = []
+        buffer.sort(key=key, reverse=reverse)
+        streams = [_read_run(run) for run in runs] + [iter(buffer)]
+        yield from heapq.merge(*streams, key=key, reverse=reverse)
+    finally:
+        for run in runs:
+            run.close()
@@ -0,0 +1,243 @@
+import json
+from bisect import bisect_left, insort
+
+from src.decorators import handle_db_errors
+from src.primitive_db.constants import TYPE_MAPPING
+from src.primitive_db.utils import get_row_value
+
+
+def dependent_views(metadata: dict, table_name: str) -> list:
+    """
+    Возвращает имена материализованных представлений,
+    построенных по таблице table_name.
+    """
+    return [name for name, entry in metadata.items()
+            if entry.get('view', {}).get('source') == table_name]
+
+
+def _row_id(row: dict) -> int:
+    # Записи представления без group by хранятся в порядке ID, как и в таблице:
+    # insert выдает ID по порядку, delete сдвигает их, а update не меняет ID.
+    # Поэтому записи можно искать и вставлять двоичным поиском.
+    return row['ID']
+
+
+def _group_key(value) -> str:
+    # Ключи JSON - строки, поэтому значение группы сериализуется:
+    # так 1, true и "1" остаются разными группами.
+    return json.dumps(value)
+
+
+def _group_index(view_data: dict) -> dict:
+    """
+    Возвращает индекс групп представления: значение группы -> позиция
+    строки группы в data. Если индекса нет, строит его.
+    """
+    if 'groups' not in view_data:
+        group_by = view_data['view']['group_by']
+        view_data['groups'] = {_group_key(view_row[group_by]): i
+                               for i, view_row in enumerate(view_data['data'])}
+    return view_data['groups']
+
+
+def _matches(view: dict, table_data: dict, row: dict) -> bool:
+    """
+    Проверяет, удовлетворяет ли запись таблицы условию where представления.
+    """
+    where_clause = view['where']
+    if not where_clause:
+        return True
+    column = list(where_clause.keys())[0]
+    return get_row_value(table_data, row, column) == where_clause[column]
+
+
+def _add_row(view_data: dict, table_data: dict, row: dict):
+    """
+    Учитывает запись таблицы в представлении:
+    - без group by: добавляет запись, сохраняя порядок по ID;
+    - с group by: увеличивает счетчик группы.
+    """
+    view = view_data['view']
+    if not _matches(view, table_data, row):
+        return
+    rows = view_data['data']
+    group_by = view['group_by']
+    if group_by is None:
+        view_row = {column: get_row_value(table_data, row, column)
+                    for column in view_data['columns']}
+        insort(rows, view_row, key=_row_id)
+        return
+    groups = _group_index(view_data)
+    group = get_row_value(table_data, row, group_by)
+    key = _group_key(group)
+    if key in groups:
+        rows[groups[key]]['count'] += 1
+    else:
+        groups[key] = len(rows)
+        rows.append({group_by: group, 'count': 1})
+
+
+def _remove_row(view_data: dict, table_data: dict, row: dict):
+    """
+    Убирает запись таблицы из представления:
+    - без group by: удаляет запись по ID;
+    - с group by: уменьшает счетчик группы, пустая группа удаляется
+      (на ее место переносится последняя группа).
+    """
+    view = view_data['view']
+    if not _matches(view, table_data, row):
+        return
+    rows = view_data['data']
+    group_by = view['group_by']
+    if group_by is None:
+        index = bisect_left(rows, row['ID'], key=_row_id)
+        if index < len(rows) and rows[index]['ID'] == row['ID']:
+            del rows[index]
+        return
+    groups = _group_index(view_data)
+    key = _group_key(get_row_value(table_data, row, group_by))
+    index = groups.get(key)
+    if index is None:
+        return
+    rows[index]['count'] -= 1
+    if rows[index]['count'] == 0:
+        del groups[key]
+        last_row = rows.pop()
+        if index < len(rows):
+            rows[index] = last_row
+            groups[_group_key(last_row[group_by])] = index
+
+
+def _shift_ids(view_data: dict, deleted_id: int):
+    """
+    Повторяет в представлении сдвиг индексов, который выполняет delete:
+    ID всех записей после удаленной уменьшаются на 1.
+    """
+    rows = view_data['data']
+    for i in range(bisect_left(rows, deleted_id, key=_row_id), len(rows)):
+        rows[i]['ID'] -= 1
+
+
+def _depends_on_id(view: dict) -> bool:
+    columns = list(view['where'] or {}) + [view['group_by']]
+    return 'ID' in columns
+
+
+def _build_view_data(view_data: dict, table_data: dict) -> dict:
+    view_data['data'] = []
+    if view_data['view']['group_by'] is not None:
+        view_data['groups'] = {}
+    for row in table_data.get('data', []):
+        _add_row(view_data, table_data, row)
+    return view_data
+
+
+@handle_db_errors
+def create_view(metadata: dict, view_name: str, table_name: str,
+                where_clause=None, group_by=None) -> dict:
+    """
+    Создает материализованное представление по таблице.
+    Представление хранится как обычная таблица и содержит
+    записи, удовлетворяющие where_clause, или, если задан group_by,
+    количество таких записей в каждой группе.
+
+    Принимает:
+        metadata (dict): текущий словарь метаданных
+        view_name (str): название представления
+        table_name (str): название исходной таблицы
+        where_clause (dict): условие фильтрации, например {'age': 28}
+        group_by (str): столбец группировки
+
+    Вызывает ValueError, если:
+    - Таблица или представление с таким названием уже существует.
+    - Исходная таблица не найдена или сама является представлением.
+    - Столбца из условия нет в таблице.
+    - Передан неверный тип данных для столбца.
+    - Группировка по столбцу count (так называется столбец счетчика).
+    """
+    if view_name in metadata:
+        raise ValueError(f'Таблица с именем "{view_name}" уже существует.')
+    if table_name not in metadata:
+        raise ValueError(f'Таблицы {table_name} нет.')
+    table_data = metadata[table_name]
+    if 'view' in table_data:
+        raise ValueError('Представление нельзя построить по представлению.')
+    columns = table_data['columns']
+    if where_clause:
+        column = list(where_clause.keys())[0]
+        if column not in columns:
+            raise ValueError(f'Столбца "{column}" нет в таблице {table_name}.')
+        expected_type = TYPE_MAPPING[columns[column]]
+        if not isinstance(where_clause[column], expected_type):
+            raise ValueError((f'Неверный тип данных для столбца "{column}"\n'
+                              f'Ожидался: {expected_type}\n'
+                              f'Получен: {type(where_clause[column])}'))
+    if group_by is not None:
+        if group_by not in columns:
+            raise ValueError(f'Столбца "{group_by}" нет в таблице {table_name}.')
+        if group_by == 'count':
+            raise ValueError(('Группировать по столбцу count нельзя: '
+                              'так называется столбец счетчика представления.'))
+        view_columns = {group_by: columns[group_by], 'count': 'int'}
+    else:
+        view_columns = dict(columns)
+
+    view_data = {
+        'columns': view_columns,
+        'view': {
+            'source': table_name,
+            'where': where_clause,
+            'group_by': group_by,
+        },
+    }
+    metadata[view_name] = _build_view_data(view_data, table_data)
+    print(f'Материализованное представление "{view_name}" успешно создано.')
+    return metadata
+
+
+@handle_db_errors
+def refresh_view(metadata: dict, view_name: str) -> dict:
+    """
+    Полностью пересчитывает материализованное представление
+    по текущему содержимому исходной таблицы.
+
+    Вызывает ValueError, если:
+    - Представление с указанным названием не найдено.
+    """
+    if 'view' not in metadata.get(view_name, {}):
+        raise ValueError(f'Представления {view_name} нет.')
+    view_data = metadata[view_name]
+    table_data = metadata[view_data['view']['source']]
+    metadata[view_name] = _build_view_data(view_data, table_data)
+    return metadata
+
+
+def apply_changes(metadata: dict, table_name: str, changes: list) -> list:
+    """
+    Применяет к представлениям изменения исходной таблицы.
+    changes - список пар (старая запись, новая запись):
+    (None, запись) - вставка, (запись, None) - удаление,
+    (запись, запись) - обновление.
+
+    Возвращает имена обновленных представлений.
+    """
+    if not changes:
+        return []
+    view_names = dependent_views(metadata, table_name)
+    table_data = metadata[table_name]
+    has_deletes = any(new_row is None for _, new_row in changes)
+    for view_name in view_names:
+        view_data = metadata[view_name]
+        if has_deletes and _depends_on_id(view_data['view']):
+            # delete сдвигает ID всех последующих записей,
+            # поэтому такое представление проще пересчитать.
+            _build_view_data(view_data, table_data)
+            continue
+        for old_row, new_row in changes:
+            if old_row is not None:
+                _remove_row(view_data, table_data, old_row)
+                if new_row is None and view_data['view']['group_by'] is None:
+                    _shift_ids(view_data, old_row['ID'])
+            if new_row is not None:
+                _add_row(view_data, table_data, new_row)
+    return view_names